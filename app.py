@@ -1,8 +1,12 @@
 import streamlit as st
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.figure import Figure
 import numpy as np
 import pandas as pd
 
+from titration_core import classify_regime, compute_conductivity, compute_ph
+
 st.set_page_config(page_title="Titration Simulator", layout="centered")
 st.title("🧪 Sample-Titrant Titration Simulator")
 
@@ -29,66 +33,74 @@ indicator_color_map = {
     "Bromothymol Blue": {"low": "yellow", "high": "blue"}
 }
 
-pKa_acetic = 4.76
-Kb_ammonia = 1.8e-5
-
-V_titrant = np.arange(0, 50 + step_size, step_size)
-pH = []
-
-for V in V_titrant:
-    V_total = sample_vol + V
-    if sample_type.startswith("Strong") and titrant_type.startswith("Strong"):
-        moles_H = sample_conc * sample_vol / 1000
-        moles_OH = titrant_conc * V / 1000
-        excess = moles_H - moles_OH
-        if excess > 0:
-            ph = -np.log10(excess / V_total * 1000)
-        elif excess < 0:
-            ph = 14 + np.log10(abs(excess) / V_total * 1000)
-        else:
-            ph = 7
-    elif sample_type.startswith("Weak") and titrant_type.startswith("Strong"):
-        Ka = 10**(-pKa_acetic)
-        moles_HA = sample_conc * sample_vol / 1000
-        moles_OH = titrant_conc * V / 1000
-        if moles_OH < moles_HA:
-            moles_A = moles_OH
-            moles_HA -= moles_OH
-            ph = pKa_acetic + np.log10(moles_A / moles_HA)
-        elif moles_OH == moles_HA:
-            ph = pKa_acetic
-        else:
-            excess_OH = (moles_OH - moles_HA) / V_total * 1000
-            ph = 14 + np.log10(excess_OH)
-    elif sample_type.startswith("Strong") and titrant_type.startswith("Weak"):
-        moles_H = sample_conc * sample_vol / 1000
-        moles_B = titrant_conc * V / 1000
-        if moles_B == 0:
-            ph = -np.log10(sample_conc)
-        else:
-            OH_conc = np.sqrt(Kb_ammonia * (moles_B / V_total * 1000))
-            ph = 14 + np.log10(OH_conc)
-    else:
-        ph = 7
-
-    pH.append(ph)
-
-# Determine indicator color change
+
+@st.cache_data
+def compute_titration(sample_type, titrant_type, sample_conc, sample_vol, titrant_conc, step_size):
+    # Every point is an exact multiple of the chosen step, stopping at the
+    # last one that fits in 50 mL.
+    n_points = int(50.0 / step_size + 1e-9) + 1
+    V_titrant = np.arange(n_points) * step_size
+    regime = classify_regime(sample_type, titrant_type)
+    pH = compute_ph(regime, sample_conc, sample_vol, titrant_conc, V_titrant)
+    conductivity = compute_conductivity(regime, sample_vol, V_titrant)
+    return V_titrant, pH, conductivity
+
+
+@st.cache_data
+def compute_indicator_colors(sample_type, titrant_type, sample_conc, sample_vol, titrant_conc, step_size, indicator):
+    _, pH, _ = compute_titration(sample_type, titrant_type, sample_conc, sample_vol, titrant_conc, step_size)
+    low, high = indicator_range[indicator]
+    return np.select(
+        [pH < low, pH > high],
+        [indicator_color_map[indicator]["low"], indicator_color_map[indicator]["high"]],
+        default="orange",
+    )
+
+
+@st.cache_data
+def export_csv(V_titrant, pH, conductivity):
+    df_export = pd.DataFrame({
+        "Volume_Titrant_mL": V_titrant,
+        "pH": pH,
+        "Conductivity": conductivity
+    })
+    return df_export.to_csv(index=False).encode("utf-8")
+
+
+# Reruns triggered only by the drop slider reuse the arrays kept in the
+# session instead of going through the cache lookups again.
+titration_key = (sample_type, titrant_type, sample_conc, sample_vol, titrant_conc, step_size, indicator)
+if st.session_state.get("titration_key") != titration_key:
+    V_titrant, pH, conductivity = compute_titration(sample_type, titrant_type, sample_conc, sample_vol, titrant_conc, step_size)
+    st.session_state.update(
+        titration_key=titration_key,
+        V_titrant=V_titrant,
+        pH=pH,
+        conductivity=conductivity,
+        colors=compute_indicator_colors(*titration_key),
+        csv_bytes=export_csv(V_titrant, pH, conductivity)
+    )
+
+V_titrant = st.session_state.V_titrant
+pH = st.session_state.pH
+conductivity = st.session_state.conductivity
+colors = st.session_state.colors
+
+# Indicator transition range, drawn as guide lines on the pH plot
 low, high = indicator_range[indicator]
-colors = []
-for val in pH:
-    if val < low:
-        colors.append(indicator_color_map[indicator]["low"])
-    elif val > high:
-        colors.append(indicator_color_map[indicator]["high"])
-    else:
-        colors.append("orange")
 
 st.subheader("📈 Drop-by-Drop Titration Control")
 st.write("Use the slider below to add titrant incrementally.")
 drop_index = st.slider("Volume of Titrant Added (mL)", min_value=0.0, max_value=float(V_titrant[-1]), value=0.0, step=step_size)
 
-fig, ax = plt.subplots()
+# One figure per session, cleared and redrawn on each rerun. It is built
+# without pyplot so it never enters pyplot's global figure registry and is
+# released along with the session.
+if "titration_fig" not in st.session_state:
+    fig = Figure()
+    st.session_state.titration_fig = (fig, fig.subplots())
+fig, ax = st.session_state.titration_fig
+ax.clear()
 ax.set_xlim(0, 50)
 ax.set_ylim(0, 14)
 ax.set_xlabel("Volume of Titrant Added (mL)")
@@ -96,7 +108,7 @@ ax.set_ylabel("pH")
 ax.set_title(f"Titration Curve ({indicator})")
 ax.grid(True)
 
-plot_index = int(drop_index / step_size) + 1
+plot_index = int(round(drop_index / step_size)) + 1
 ax.scatter(V_titrant[:plot_index], pH[:plot_index], c=colors[:plot_index], s=30)
 ax.axhline(low, color='gray', linestyle='--', linewidth=0.8)
 ax.axhline(high, color='gray', linestyle='--', linewidth=0.8)
@@ -104,36 +116,23 @@ st.pyplot(fig)
 
 # Conductivity approximation
 st.subheader("🔌 Conductometric Titration")
-conductivity = []
-for i, V in enumerate(V_titrant):
-    if sample_type.startswith("Strong") and titrant_type.startswith("Strong"):
-        if V < sample_vol:
-            cond = 10 - 0.1 * V
-        elif V == sample_vol:
-            cond = 5
-        else:
-            cond = 5 + 0.15 * (V - sample_vol)
-    else:
-        cond = 5 + 0.02 * (V - sample_vol)
-    conductivity.append(cond)
-
-fig2, ax2 = plt.subplots()
-ax2.plot(V_titrant, conductivity, color='purple')
-ax2.set_xlabel("Volume of Titrant Added (mL)")
-ax2.set_ylabel("Conductivity (a.u.)")
-ax2.set_title("Conductometric Titration Curve")
-ax2.grid(True)
-st.pyplot(fig2)
+st.line_chart(
+    pd.DataFrame({
+        "Volume of Titrant Added (mL)": V_titrant,
+        "Conductivity (a.u.)": conductivity
+    }),
+    x="Volume of Titrant Added (mL)",
+    y="Conductivity (a.u.)",
+    color="#800080"
+)
 
 # Export results
-if st.button("📤 Export Results to CSV"):
-    df_export = pd.DataFrame({
-        "Volume_Titrant_mL": V_titrant,
-        "pH": pH,
-        "Conductivity": conductivity
-    })
-    df_export.to_csv("titration_results.csv", index=False)
-    st.success("✅ Results exported to titration_results.csv")
+st.download_button(
+    "📤 Export Results to CSV",
+    st.session_state.csv_bytes,
+    file_name="titration_results.csv",
+    mime="text/csv"
+)
 
 st.markdown("""
 ### Notes:
@@ -0,0 +1,74 @@
+import numpy as np
+
+pKw = 14.0
+pKa_acetic = 4.76
+Kb_ammonia = 1.8e-5
+
+# H+/OH- concentration of pure water, the floor for any excess strong acid/base.
+neutral_conc = 10 ** (-pKw / 2)
+# Relative tolerance for treating titrant moles as equal to sample moles.
+eq_rtol = 1e-9
+
+# Titration regimes: bit 1 set for a weak sample, bit 0 set for a weak titrant.
+STRONG_STRONG = 0
+STRONG_WEAK = 1
+WEAK_STRONG = 2
+WEAK_WEAK = 3
+
+
+def classify_regime(sample_type, titrant_type):
+    return (0 if sample_type.startswith("Strong") else 2) | (0 if titrant_type.startswith("Strong") else 1)
+
+
+def compute_ph(regime, sample_conc, sample_vol, titrant_conc, V_titrant):
+    moles_sample = sample_conc * sample_vol / 1000
+    moles_titrant = titrant_conc * V_titrant / 1000
+    V_total_L = (sample_vol + V_titrant) / 1000
+
+    # Each formula is evaluated only where it applies and written into a
+    # preallocated buffer, so no branch is computed for discarded points.
+    # Arithmetic runs in float64; float32 is plenty for the stored pH.
+    pH = np.empty(V_titrant.shape, dtype=np.float32)
+    if regime == STRONG_STRONG:
+        # Points within rounding of equivalence are neutral, and leftover
+        # H+/OH- never drops below what water itself supplies.
+        excess = moles_sample - moles_titrant
+        at_eq = np.isclose(moles_titrant, moles_sample, rtol=eq_rtol, atol=0.0)
+        acidic = (excess > 0) & ~at_eq
+        basic = (excess < 0) & ~at_eq
+        pH[acidic] = -np.log10(np.maximum(excess[acidic] / V_total_L[acidic], neutral_conc))
+        pH[basic] = pKw + np.log10(np.maximum(-excess[basic] / V_total_L[basic], neutral_conc))
+        pH[at_eq] = pKw / 2
+    elif regime == WEAK_STRONG:
+        moles_HA = moles_sample
+        initial = moles_titrant == 0
+        at_eq = np.isclose(moles_titrant, moles_HA, rtol=eq_rtol, atol=0.0)
+        buffer = (moles_titrant < moles_HA) & ~at_eq & ~initial
+        past_eq = (moles_titrant > moles_HA) & ~at_eq
+        pH[initial] = 0.5 * (pKa_acetic - np.log10(sample_conc))
+        pH[buffer] = pKa_acetic + np.log10(moles_titrant[buffer] / (moles_HA - moles_titrant[buffer]))
+        excess_OH = np.maximum((moles_titrant[past_eq] - moles_HA) / V_total_L[past_eq], neutral_conc)
+        pH[past_eq] = pKw + np.log10(excess_OH)
+        # At equivalence only the conjugate base remains; its hydrolysis sets pH.
+        c_A = moles_HA / V_total_L[at_eq]
+        pH[at_eq] = pKw - 0.5 * (pKw - pKa_acetic - np.log10(c_A))
+    elif regime == STRONG_WEAK:
+        added = moles_titrant > 0
+        OH_conc = np.sqrt(Kb_ammonia * (moles_titrant[added] / V_total_L[added]))
+        pH[added] = pKw + np.log10(OH_conc)
+        pH[~added] = -np.log10(sample_conc)
+    else:
+        pH.fill(pKw / 2)
+    return pH
+
+
+def compute_conductivity(regime, sample_vol, V_titrant):
+    conductivity = np.empty(V_titrant.shape, dtype=np.float32)
+    if regime == STRONG_STRONG:
+        before_eq = V_titrant < sample_vol
+        after_eq = ~before_eq
+        conductivity[before_eq] = 10 - 0.1 * V_titrant[before_eq]
+        conductivity[after_eq] = 5 + 0.15 * (V_titrant[after_eq] - sample_vol)
+    else:
+        conductivity[:] = 5 + 0.02 * (V_titrant - sample_vol)
+    return conductivity